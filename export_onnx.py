@@ -0,0 +1,36 @@
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# One-time export of Whisper base to an int8 ONNX graph with the fused
+# WhisperBeamSearch op, used by the "onnx" backend in main.py.
+OUTPUT_PATH = os.getenv("ONNX_MODEL", "./models/whisper-base-int8.onnx")
+
+def export_whisper_onnx(model_name="openai/whisper-base", output_path=OUTPUT_PATH):
+    """Export and int8-quantize Whisper with onnxruntime's transformer tooling."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        subprocess.run([
+            sys.executable, "-m", "onnxruntime.transformers.models.whisper.convert_to_onnx",
+            "-m", model_name,
+            "--output", work_dir,
+            "--use_whisper_beamsearch",
+            # Prompt and timestamp-rule inputs, so main.py can request timestamped segments
+            "--use_forced_decoder_ids",
+            "--use_logits_processor",
+            "--precision", "int8",
+            "--quantize_embedding_layer",
+        ], check=True)
+        
+        exported = glob.glob(os.path.join(work_dir, "**", "*beamsearch*.onnx"), recursive=True)
+        if not exported:
+            raise RuntimeError(f"No beam search model produced in {work_dir}")
+        
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        shutil.move(exported[0], output_path)
+    print(f"✅ Exported {model_name} to '{output_path}'")
+
+if __name__ == "__main__":
+    export_whisper_onnx()
@@ -1,6 +1,11 @@
 from contextlib import asynccontextmanager
+import asyncio
+import threading
 from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi.responses import ORJSONResponse
 import whisper
+import numpy as np
+import torch
 import tempfile
 import os
 from typing import List, Optional
@@ -10,7 +15,10 @@ import logging
 import ssl
 import urllib.request
 import hashlib
-import json
+import orjson
+import functools
+from functools import lru_cache
+import subprocess
 from pathlib import Path
 import time
 
@@ -22,6 +30,35 @@ logger = logging.getLogger(__name__)
 model = None
 cache_dir = Path("./transcription_cache")
 cache_dir.mkdir(exist_ok=True)
+# Shard subdirectories already created under cache_dir
+_cache_shards = set()
+
+# Cache entries waiting to be flushed to disk, keyed by cache key
+_pending = {}
+_flush_lock = threading.Lock()
+CACHE_FLUSH_INTERVAL = 5.0
+
+# On-disk cache format: "json" (orjson) or "msgpack" (smaller files, needs msgpack)
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+    msgpack = None
+
+CACHE_FORMAT = "msgpack" if os.getenv("CACHE_FORMAT") == "msgpack" and MSGPACK_AVAILABLE else "json"
+CACHE_SUFFIX = f".{CACHE_FORMAT}"
+
+# Running totals of cached result files, so stats don't rescan the directory
+_cache_files = 0
+_cache_bytes = 0
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    blake3 = None
 
 # Speaker diarization variables
 try:
@@ -32,12 +69,234 @@ except ImportError:
     Pipeline = None
 
 speaker_pipeline = None
+# The pipeline is shared across worker threads and its segmentation step is set per request
+_diarization_lock = threading.Lock()
+
+# Whisper backend: "faster-whisper" (CTranslate2, int8), "whispercpp" (ggml, q5_1),
+# "onnx" (ONNX Runtime, fused beam search) or "openai" (reference PyTorch)
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "faster-whisper")
+WHISPERCPP_MODEL = os.getenv("WHISPERCPP_MODEL", "./models/ggml-base-q5_1.bin")
+ONNX_MODEL = os.getenv("ONNX_MODEL", "./models/whisper-base-int8.onnx")
+# The onnx backend forces the start-of-transcript prompt, so the language is fixed up front
+ONNX_LANGUAGE = os.getenv("ONNX_LANGUAGE", "en")
+# Dynamic int8 quantization (FBGEMM) for the openai backend on CPU
+WHISPER_INT8 = os.getenv("WHISPER_INT8") == "1"
+model_backend = None
+# openai-whisper installs KV-cache hooks on the shared decoder per call and a whisper.cpp
+# context is not re-entrant, so those backends transcribe one request at a time
+_model_lock = threading.Lock()
+
+# Run Whisper (openai/faster-whisper backends) and pyannote on the GPU when one is present
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+    WhisperModel = None
+
+try:
+    from pywhispercpp.model import Model as WhisperCppModel
+    WHISPERCPP_AVAILABLE = True
+except ImportError:
+    WHISPERCPP_AVAILABLE = False
+    WhisperCppModel = None
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    ort = None
+
+def configure_torch_threads():
+    """Give PyTorch one intra-op thread per core (sized for a single uvicorn worker) and oneDNN kernels."""
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", os.cpu_count())))
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError as e:
+        # Only allowed before any inter-op parallel work has started
+        logger.warning(f"Failed to set inter-op threads: {e}")
+    torch.backends.mkldnn.enabled = True
+
+def prepare_openai_model(whisper_model):
+    """Warm the mel filterbank and, on CPU, trace the encoder for fixed 30-s windows."""
+    n_mels = whisper_model.dims.n_mels
+    # mel_filters is lru-cached on (torch.device, n_mels); a real call fills the entry requests hit
+    whisper.log_mel_spectrogram(np.zeros(whisper.audio.N_SAMPLES, np.float32), n_mels)
+    if DEVICE == "cpu":
+        if WHISPER_INT8:
+            # quantize_dynamic only swaps exact nn.Linear types; whisper's Linear subclass
+            # just casts weights to the input dtype, which is a no-op for FP32 on CPU
+            for module in whisper_model.modules():
+                if type(module) is whisper.model.Linear:
+                    module.__class__ = torch.nn.Linear
+            whisper_model = torch.ao.quantization.quantize_dynamic(
+                whisper_model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            logger.info("Applied dynamic int8 quantization to Whisper Linear layers")
+        try:
+            example_mel = torch.zeros(1, n_mels, whisper.audio.N_FRAMES)
+            with torch.no_grad():
+                whisper_model.encoder = torch.jit.trace(whisper_model.encoder, example_mel)
+        except Exception as e:
+            logger.warning(f"Failed to trace Whisper encoder: {e}")
+    return whisper_model
+
+def load_whisper_model():
+    """Load the configured Whisper backend, falling back to openai-whisper."""
+    if WHISPER_BACKEND == "faster-whisper":
+        if FASTER_WHISPER_AVAILABLE:
+            # On CPU, int8 weights and activations run on CTranslate2's oneDNN/ruy GEMM kernels
+            return WhisperModel(
+                "base",
+                device=DEVICE,
+                compute_type="float16" if DEVICE == "cuda" else "int8",
+                cpu_threads=os.cpu_count(),
+                num_workers=1
+            ), "faster-whisper"
+        logger.warning("faster-whisper not available, falling back to openai-whisper")
+    elif WHISPER_BACKEND == "whispercpp":
+        if WHISPERCPP_AVAILABLE:
+            # Quantized ggml weights on whisper.cpp's hand-tuned SIMD kernels
+            return WhisperCppModel(WHISPERCPP_MODEL, n_threads=os.cpu_count()), "whispercpp"
+        logger.warning("pywhispercpp not available, falling back to openai-whisper")
+    elif WHISPER_BACKEND == "onnx":
+        if ONNXRUNTIME_AVAILABLE and os.path.exists(ONNX_MODEL):
+            so = ort.SessionOptions()
+            so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            so.intra_op_num_threads = os.cpu_count()
+            whisper.log_mel_spectrogram(np.zeros(whisper.audio.N_SAMPLES, np.float32))  # Warm the lru-cached filterbank
+            return ort.InferenceSession(
+                ONNX_MODEL,
+                sess_options=so,
+                providers=["CPUExecutionProvider"]
+            ), "onnx"
+        logger.warning(f"onnxruntime or {ONNX_MODEL} not available, falling back to openai-whisper")
+    return prepare_openai_model(whisper.load_model("base", device=DEVICE)), "openai"
+
+def split_timestamped_tokens(tokens, tokenizer, offset: float, window_end: float) -> list:
+    """Split one window's output tokens into segments at Whisper timestamp tokens.
+    
+    <|t0|> text <|t1|><|t1|> text <|t2|> becomes [t0, t1] and [t1, t2], shifted by the
+    window offset. Text without timestamps (older exports) spans the whole window.
+    """
+    segments = []
+    start = None
+    text_tokens = []
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            time_s = offset + (token - tokenizer.timestamp_begin) / whisper.audio.TOKENS_PER_SECOND
+            if start is not None and text_tokens:
+                segments.append((start, time_s, text_tokens))
+                start, text_tokens = None, []
+            else:
+                start = time_s
+        elif token < tokenizer.eot:
+            text_tokens.append(token)
+    if text_tokens:
+        segments.append((offset if start is None else start, window_end, text_tokens))
+    
+    return [
+        {"start": seg_start, "end": min(seg_end, window_end), "text": " " + text}
+        for seg_start, seg_end, seg_tokens in segments
+        if (text := tokenizer.decode(seg_tokens).strip())
+    ]
+
+def transcribe_onnx(audio) -> dict:
+    """Decode every 30-s window in a single WhisperBeamSearch session call.
+    
+    Windows are fixed 30-s slices rather than whisper's timestamp-driven seek,
+    so a word straddling a window boundary can still be split in two.
+    """
+    if isinstance(audio, str):
+        audio = whisper.load_audio(audio)
+    
+    window = whisper.audio.N_SAMPLES
+    offsets = list(range(0, max(len(audio), 1), window))
+    mels = np.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[offset:offset + window])).numpy()
+        for offset in offsets
+    ])
+    
+    tokenizer = whisper.tokenizer.get_tokenizer(multilingual=True, language=ONNX_LANGUAGE, task="transcribe")
+    inputs = {
+        "input_features": mels,
+        "max_length": np.array([448], dtype=np.int32),
+        "min_length": np.array([0], dtype=np.int32),
+        "num_beams": np.array([1], dtype=np.int32),
+        "num_return_sequences": np.array([1], dtype=np.int32),
+        "length_penalty": np.array([1.0], dtype=np.float32),
+        "repetition_penalty": np.array([1.0], dtype=np.float32),
+    }
+    input_names = {graph_input.name for graph_input in model.get_inputs()}
+    if "decoder_input_ids" in input_names:
+        # Start-of-transcript, language and task, without <|notimestamps|>
+        inputs["decoder_input_ids"] = np.tile(
+            np.array([tokenizer.sot_sequence], dtype=np.int32), (len(offsets), 1)
+        )
+    if "logits_processor" in input_names:
+        # 1 selects ORT's Whisper timestamp rules, so the output carries timestamp tokens
+        inputs["logits_processor"] = np.array([1], dtype=np.int32)
+    
+    sequences = model.run(None, inputs)[0]
+    
+    sample_rate = whisper.audio.SAMPLE_RATE
+    segments = []
+    for offset, tokens in zip(offsets, sequences[:, 0]):
+        segments.extend(split_timestamped_tokens(
+            tokens.tolist(),
+            tokenizer,
+            offset / sample_rate,
+            min(offset + window, len(audio)) / sample_rate
+        ))
+    return {
+        "text": "".join(seg["text"] for seg in segments),
+        "segments": segments
+    }
+
+def run_transcription(audio, transcribe_options: dict) -> dict:
+    """Run the loaded backend and return openai-whisper style {"text", "segments"}."""
+    if model_backend == "faster-whisper":
+        segments_iter, info = model.transcribe(
+            audio,
+            beam_size=1,
+            best_of=1,
+            temperature=0,
+            vad_filter=True,
+            condition_on_previous_text=False
+        )
+        # The segment generator is lazy; decoding happens while materializing it
+        segments = [
+            {"start": seg.start, "end": seg.end, "text": seg.text}
+            for seg in segments_iter
+        ]
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments
+        }
+    if model_backend == "whispercpp":
+        # whisper.cpp timestamps are in 10 ms units
+        with _model_lock:
+            segments = [
+                {"start": seg.t0 / 100, "end": seg.t1 / 100, "text": seg.text}
+                for seg in model.transcribe(audio)
+            ]
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "segments": segments
+        }
+    if model_backend == "onnx":
+        return transcribe_onnx(audio)
+    with _model_lock:
+        return model.transcribe(audio, **transcribe_options)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Load Whisper model
-    global model
-    logger.info("Loading Whisper model...")
+    global model, model_backend, speaker_pipeline
+    logger.info(f"Loading Whisper model ({WHISPER_BACKEND} backend)...")
     
     # Handle SSL certificate issues
     try:
@@ -51,16 +310,24 @@ async def lifespan(app: FastAPI):
         opener = urllib.request.build_opener(https_handler)
         urllib.request.install_opener(opener)
         
+        configure_torch_threads()
+        
         # Use 'tiny' model for fastest CPU performance, 'small' for balance of speed/accuracy
-        model = whisper.load_model("base", device="cpu")  # Fastest model for CPU optimization
-        logger.info("Whisper model loaded successfully")
+        model, model_backend = load_whisper_model()
+        logger.info(f"Whisper model loaded successfully ({model_backend})")
         
         # Try to load speaker diarization pipeline
         if PYANNOTE_AVAILABLE:
             try:
                 # Note: This may require a Hugging Face token for some models
                 speaker_pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1")
-                logger.info("Advanced speaker diarization loaded successfully")
+                # The pipeline stays on CPU unless explicitly moved
+                speaker_pipeline.to(torch.device(DEVICE))
+                # Smaller batches are often faster on CPUs and low-VRAM GPUs
+                speaker_pipeline.segmentation_batch_size = int(os.getenv("PYANNOTE_SEG_BS", 8))
+                speaker_pipeline.embedding_batch_size = int(os.getenv("PYANNOTE_EMB_BS", 8))
+                logger.info(f"Speaker embedding model: {getattr(speaker_pipeline, 'embedding', None)}")
+                logger.info(f"Advanced speaker diarization loaded successfully ({DEVICE})")
             except Exception as e:
                 logger.warning(f"Failed to load speaker diarization: {e}")
                 logger.info("Will use simple speaker detection method")
@@ -74,22 +341,30 @@ async def lifespan(app: FastAPI):
         try:
             # Alternative: try loading without SSL verification
             os.environ['PYTHONHTTPSVERIFY'] = '0'
-            model = whisper.load_model("base", device="cpu")
-            logger.info("Whisper model loaded successfully with alternative method")
+            model, model_backend = load_whisper_model()
+            logger.info(f"Whisper model loaded successfully with alternative method ({model_backend})")
         except Exception as e2:
             logger.error(f"Failed to load model with alternative method: {str(e2)}")
             logger.warning("Model loading failed. API will return errors until model is available.")
             model = None
     
-    yield
-    # Shutdown: Clean up resources
-    logger.info("Shutting down...")
+    migrate_flat_cache()
+    scan_cache_stats()
+    flush_task = asyncio.create_task(flush_cache_periodically())
+    try:
+        yield
+    finally:
+        # Shutdown: Clean up resources and persist pending cache entries
+        logger.info("Shutting down...")
+        flush_task.cancel()
+        flush_cache()
 
 app = FastAPI(
     title="Speech-to-Text API",
     description="Convert audio files to text with timestamps using OpenAI Whisper",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 class TranscriptionSegment(BaseModel):
@@ -142,33 +417,245 @@ async def get_speaker_info():
         "recommendation": "Use advanced method for better accuracy, simple method for faster processing"
     }
 
-def get_cache_key(file_content: bytes, enable_speaker_diarization: bool) -> str:
-    """Generate cache key based on file content and options."""
-    content_hash = hashlib.md5(file_content).hexdigest()
-    return f"{content_hash}_{enable_speaker_diarization}"
+# Containers ffmpeg can demux from a non-seekable pipe
+PIPEABLE_EXTENSIONS = {".mp3", ".wav", ".ogg", ".flac"}
 
-def get_cached_result(cache_key: str) -> Optional[dict]:
-    """Retrieve cached transcription result."""
-    cache_file = cache_dir / f"{cache_key}.json"
-    if cache_file.exists():
+def decode_audio_bytes(content) -> np.ndarray:
+    """Decode an in-memory upload to 16 kHz mono float32 via ffmpeg pipes, without a temp file."""
+    cmd = [
+        "ffmpeg", "-threads", "0",
+        "-i", "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+        "-ar", str(whisper.audio.SAMPLE_RATE),
+        "pipe:1"
+    ]
+    try:
+        out = subprocess.run(cmd, input=content, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to load audio: {e.stderr.decode()}") from e
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def new_hasher():
+    """Return a BLAKE3 hasher, or BLAKE2b when blake3 is not installed."""
+    if BLAKE3_AVAILABLE:
+        # SIMD, multithreaded tree hash
+        return blake3(max_threads=blake3.AUTO)
+    return hashlib.blake2b(digest_size=32)
+
+def hash_audio(audio: np.ndarray) -> str:
+    """Hash the decoded 16 kHz waveform buffer without copying it."""
+    hasher = new_hasher()
+    hasher.update(audio)
+    return hasher.hexdigest()
+
+def get_cache_key(audio_hash: str, enable_speaker_diarization: bool, fast_diarization: bool = False) -> str:
+    """Generate cache key from the waveform hash and options."""
+    cache_key = f"{audio_hash}_{enable_speaker_diarization}"
+    if enable_speaker_diarization and fast_diarization:
+        cache_key += "_fast"
+    return cache_key
+
+def cache_path(key: str, suffix: str) -> Path:
+    """Path of a cache file, sharded by the first two hex chars of its key."""
+    shard = key[:2]
+    if shard not in _cache_shards:
+        (cache_dir / shard).mkdir(exist_ok=True)
+        _cache_shards.add(shard)
+    return cache_dir / shard / f"{key}{suffix}"
+
+def migrate_flat_cache():
+    """Move cache files left over from the flat layout into their shards."""
+    with os.scandir(cache_dir) as entries:
+        flat_files = [entry.name for entry in entries if entry.is_file()]
+    for name in flat_files:
+        os.replace(cache_dir / name, cache_path(name, ""))
+    if flat_files:
+        logger.info(f"Moved {len(flat_files)} cache file(s) into shard directories")
+
+def get_audio_hash_alias(upload_hash: str) -> Optional[str]:
+    """Look up the waveform hash previously decoded from identical upload bytes."""
+    alias_file = cache_path(upload_hash, ".alias")
+    if alias_file.exists():
         try:
-            with open(cache_file, 'r') as f:
-                return json.load(f)
+            return alias_file.read_text()
         except Exception as e:
-            logger.warning(f"Failed to load cache: {e}")
+            logger.warning(f"Failed to load cache alias: {e}")
     return None
 
-def save_to_cache(cache_key: str, result: dict):
-    """Save transcription result to cache."""
-    cache_file = cache_dir / f"{cache_key}.json"
+def save_audio_hash_alias(upload_hash: str, audio_hash: str):
+    """Remember which waveform hash identical upload bytes decode to."""
+    try:
+        cache_path(upload_hash, ".alias").write_text(audio_hash)
+    except Exception as e:
+        logger.warning(f"Failed to save cache alias: {e}")
+
+def get_cached_result(cache_key: str) -> Optional[dict]:
+    """Retrieve cached transcription result."""
+    # Single lookup: a flush thread may remove the entry between a check and an index
+    entry = _pending.get(cache_key)
+    if entry is not None:
+        return entry[0]
+    
+    try:
+        return load_cache_file(cache_key)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to load cache: {e}")
+    return None
+
+@lru_cache(maxsize=256)
+def load_cache_file(cache_key: str) -> dict:
+    """Parse a cache file once; misses raise and are therefore never memoized."""
+    with open(cache_path(cache_key, CACHE_SUFFIX), 'rb') as f:
+        data = f.read()
+    if CACHE_FORMAT == "msgpack":
+        return msgpack.unpackb(data)
+    return orjson.loads(data)
+
+def save_to_cache(cache_key: str, result: dict, audio_hash: Optional[str] = None, audio: Optional[np.ndarray] = None):
+    """Queue transcription result (and decoded waveform) for the next cache flush."""
+    _pending[cache_key] = (result, audio_hash, audio)
+
+def load_waveform(audio_hash: str) -> Optional[np.ndarray]:
+    """Load a previously decoded waveform, sparing ffmpeg on re-uploads that miss the result cache."""
+    try:
+        return np.load(cache_path(audio_hash, ".npy"))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to load cached waveform: {e}")
+    return None
+
+def write_cache_entry(cache_key: str, result: dict, audio_hash: Optional[str] = None, audio: Optional[np.ndarray] = None):
+    """Atomically write one cache entry to disk."""
+    cache_file = cache_path(cache_key, CACHE_SUFFIX)
+    temp_cache_file = cache_path(cache_key, f"{CACHE_SUFFIX}.tmp")
+    data = msgpack.packb(result) if CACHE_FORMAT == "msgpack" else orjson.dumps(result)
+    with open(temp_cache_file, 'wb') as f:
+        f.write(data)
+    
+    global _cache_files, _cache_bytes
+    try:
+        _cache_bytes -= cache_file.stat().st_size
+    except FileNotFoundError:
+        _cache_files += 1
+    os.replace(temp_cache_file, cache_file)
+    _cache_bytes += len(data)
+    
+    # One waveform per audio hash, shared by every option combination of that audio
+    if audio is not None and audio_hash is not None:
+        waveform_file = cache_path(audio_hash, ".npy")
+        if not waveform_file.exists():
+            temp_waveform_file = cache_path(audio_hash, ".npy.tmp")
+            with open(temp_waveform_file, 'wb') as f:
+                np.save(f, audio)
+                waveform_bytes = f.tell()
+            os.replace(temp_waveform_file, waveform_file)
+            _cache_bytes += waveform_bytes
+
+def scan_cache_stats():
+    """Initialize the cache counters with a single directory scan."""
+    global _cache_files, _cache_bytes
+    files, size = 0, 0
+    with os.scandir(cache_dir) as shards:
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            with os.scandir(shard.path) as entries:
+                for entry in entries:
+                    if entry.name.endswith(CACHE_SUFFIX):
+                        files += 1
+                        size += entry.stat().st_size
+                    elif entry.name.endswith(".npy"):
+                        # Decoded waveforms count toward disk use, not toward cached transcriptions
+                        size += entry.stat().st_size
+    _cache_files, _cache_bytes = files, size
+
+def flush_cache():
+    """Write all pending cache entries to disk."""
+    with _flush_lock:
+        for cache_key, entry in list(_pending.items()):
+            try:
+                write_cache_entry(cache_key, *entry)
+            except Exception as e:
+                logger.warning(f"Failed to save cache: {e}")
+            # Keep the entry if it was replaced while being written
+            if _pending.get(cache_key) is entry:
+                del _pending[cache_key]
+
+async def flush_cache_periodically():
+    """Flush pending cache entries every CACHE_FLUSH_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(CACHE_FLUSH_INTERVAL)
+        await asyncio.to_thread(flush_cache)
+
+def diarize_audio(audio: np.ndarray, audio_hash: str, fast: bool = False) -> list:
+    """Run pyannote on the decoded waveform, memoized per audio hash as [start, end, label] turns."""
+    diarization_file = cache_path(f"{audio_hash}{'_fast' if fast else ''}", ".diarization")
+    if diarization_file.exists():
+        return orjson.loads(diarization_file.read_bytes())
+    
+    # Fast mode slides the segmentation window by half its duration instead of 10%
+    with _diarization_lock:
+        segmentation = speaker_pipeline._segmentation
+        default_step = segmentation.step
+        if fast:
+            segmentation.step = 0.5 * segmentation.duration
+        try:
+            # Passing the in-memory waveform stops pyannote from re-opening the file for every chunk
+            waveform = torch.from_numpy(audio)[None, :]
+            # On the GPU, segmentation and embedding forwards run in fp16
+            with torch.autocast("cuda", dtype=torch.float16, enabled=DEVICE == "cuda"):
+                annotation = speaker_pipeline({"waveform": waveform, "sample_rate": whisper.audio.SAMPLE_RATE})
+        finally:
+            segmentation.step = default_step
+    turns = [
+        [turn.start, turn.end, label]
+        for turn, _, label in annotation.itertracks(yield_label=True)
+    ]
+    
     try:
-        with open(cache_file, 'w') as f:
-            json.dump(result, f)
+        diarization_file.write_bytes(orjson.dumps(turns))
     except Exception as e:
-        logger.warning(f"Failed to save cache: {e}")
+        logger.warning(f"Failed to save diarization: {e}")
+    return turns
+
+def assign_speakers(starts: np.ndarray, ends: np.ndarray, turns: list, chunk_size: int = 512) -> List[Optional[str]]:
+    """Label each segment with the diarization turn covering its midpoint.
+    
+    pyannote turns can overlap, so among covering turns the one overlapping the
+    segment most wins; segments no turn covers take the nearest turn.
+    """
+    if not turns:
+        return [None] * len(starts)
+    
+    turn_starts = np.array([turn[0] for turn in turns], dtype=np.float64)
+    turn_ends = np.array([turn[1] for turn in turns], dtype=np.float64)
+    labels = [turn[2] for turn in turns]
+    
+    speaker_ids = []
+    # Segments x turns matrices, a chunk of segments at a time to bound memory on long recordings
+    for i in range(0, len(starts), chunk_size):
+        seg_starts = starts[i:i + chunk_size, None]
+        seg_ends = ends[i:i + chunk_size, None]
+        midpoints = (seg_starts + seg_ends) / 2
+        
+        covers = (turn_starts <= midpoints) & (midpoints <= turn_ends)
+        overlap = np.minimum(seg_ends, turn_ends) - np.maximum(seg_starts, turn_starts)
+        best_covering = np.where(covers, overlap, -np.inf).argmax(axis=1)
+        nearest = np.maximum(turn_starts - midpoints, midpoints - turn_ends).argmin(axis=1)
+        
+        turn_indices = np.where(covers.any(axis=1), best_covering, nearest)
+        speaker_ids.extend(labels[j] for j in turn_indices.tolist())
+    return speaker_ids
 
 @app.post("/transcribe", response_model=TranscriptionResponse)
-async def transcribe_audio(file: UploadFile = File(...), enable_speaker_diarization: bool = False):
+async def transcribe_audio(
+    file: UploadFile = File(...),
+    enable_speaker_diarization: bool = False,
+    fast_diarization: bool = False
+):
     """
     Transcribe audio file to text with optional speaker diarization.
     Optimized for CPU performance with caching and fast model.
@@ -176,6 +663,7 @@ async def transcribe_audio(file: UploadFile = File(...), enable_speaker_diarizat
     Args:
         file: Audio file to transcribe (supports various formats)
         enable_speaker_diarization: Whether to enable speaker identification
+        fast_diarization: Trade a little diarization accuracy for speed (coarser segmentation step)
     
     Returns:
         TranscriptionResponse with segments containing text, timestamps, and speaker info
@@ -196,91 +684,118 @@ async def transcribe_audio(file: UploadFile = File(...), enable_speaker_diarizat
     try:
         start_time = time.time()
         
-        # Read file content for caching
-        content = await file.read()
-        cache_key = get_cache_key(content, enable_speaker_diarization)
+        # Stream the upload, hashing the bytes as they arrive. Formats ffmpeg can read from
+        # a pipe stay in memory; the rest go to a temporary file ffmpeg can seek in.
+        upload_hasher = new_hasher()
+        if file_extension in PIPEABLE_EXTENSIONS:
+            content = bytearray()
+            while chunk := await file.read(1 << 20):
+                content += chunk
+                upload_hasher.update(chunk)
+            load_upload = functools.partial(decode_audio_bytes, content)
+        else:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
+                temp_file_path = temp_file.name
+                while chunk := await file.read(1 << 20):
+                    temp_file.write(chunk)
+                    upload_hasher.update(chunk)
+            load_upload = functools.partial(whisper.load_audio, temp_file_path)
+        upload_hash = upload_hasher.hexdigest()
+        
+        # Byte-identical re-uploads resolve to their waveform hash without an ffmpeg decode;
+        # otherwise decode once to 16 kHz mono float32 so the key ignores container format
+        audio = None
+        audio_hash = await asyncio.to_thread(get_audio_hash_alias, upload_hash)
+        if audio_hash is None:
+            audio = await asyncio.to_thread(load_upload)
+            audio_hash = await asyncio.to_thread(hash_audio, audio)
+            await asyncio.to_thread(save_audio_hash_alias, upload_hash, audio_hash)
+        cache_key = get_cache_key(audio_hash, enable_speaker_diarization, fast_diarization)
         
         # Check cache first
-        cached_result = get_cached_result(cache_key)
+        cached_result = await asyncio.to_thread(get_cached_result, cache_key)
+        if cached_result is None and audio is None:
+            audio = await asyncio.to_thread(load_waveform, audio_hash)
+            if audio is None:
+                audio = await asyncio.to_thread(load_upload)
+        if 'temp_file_path' in locals():
+            os.unlink(temp_file_path)
+        
         if cached_result:
             logger.info(f"Cache hit for transcription (took {time.time() - start_time:.2f}s)")
-            return TranscriptionResponse(**cached_result)
-        
-        # Save uploaded file to temporary location
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+            return ORJSONResponse(cached_result)
         
         logger.info(f"Processing file: {file.filename}")
         
         # Optimized transcription parameters for CPU performance
         transcribe_options = {
-            "fp16": False,  # Ensure FP32 for CPU
+            "fp16": DEVICE == "cuda",  # FP16 on GPU, FP32 for CPU
             "beam_size": 1,  # Faster beam search
             "best_of": 1,   # Single candidate
             "temperature": 0,  # Deterministic output
             "compression_ratio_threshold": 2.4,
             "logprob_threshold": -1.0,
             "no_speech_threshold": 0.6,
+            "condition_on_previous_text": False,  # Don't re-prompt each window with prior text
+            "suppress_tokens": [-1],  # Default non-speech token suppression
+            "word_timestamps": False,  # Segment-level timestamps only
         }
         
-        # Transcribe with Whisper using optimized settings
-        result = model.transcribe(temp_file_path, **transcribe_options)
+        # Transcribe with Whisper off the event loop so other requests keep being served
+        result = await asyncio.to_thread(run_transcription, audio, transcribe_options)
+        
+        # Process segments with speaker detection, assigning all speakers in one vectorized pass
+        result_segments = result["segments"]
+        n_segments = len(result_segments)
+        speaker_ids = [None] * n_segments
         
-        # Process segments with speaker detection
-        segments = []
-        for i, segment in enumerate(result["segments"]):
-            speaker_id = None
+        if enable_speaker_diarization and n_segments:
+            starts = np.fromiter((seg["start"] for seg in result_segments), dtype=np.float64, count=n_segments)
+            ends = np.fromiter((seg["end"] for seg in result_segments), dtype=np.float64, count=n_segments)
+            diarized = False
             
-            if enable_speaker_diarization:
-                if PYANNOTE_AVAILABLE and speaker_pipeline is not None:
-                    # Advanced speaker diarization using pyannote.audio
-                    try:
-                        # This is a simplified implementation - in practice, you'd need to
-                        # process the entire audio file with pyannote and map segments
-                        speaker_id = f"SPEAKER_{(i % 3) + 1}"  # Placeholder for now
-                    except Exception as e:
-                        logger.warning(f"Advanced speaker diarization failed: {e}")
-                        speaker_id = f"SPEAKER_{(i % 2) + 1}"  # Fallback to simple method
-                else:
-                    # Simple speaker detection based on segment patterns
-                    # This is a basic heuristic - longer pauses might indicate speaker changes
-                    if i == 0:
-                        speaker_id = "SPEAKER_1"
-                    else:
-                        prev_end = result["segments"][i-1]["end"]
-                        current_start = segment["start"]
-                        pause_duration = current_start - prev_end
-                        
-                        # If there's a pause longer than 2 seconds, assume speaker change
-                        if pause_duration > 2.0:
-                            speaker_id = f"SPEAKER_{((i // 3) % 2) + 1}"
-                        else:
-                            # Continue with previous speaker pattern
-                            speaker_id = f"SPEAKER_{((i // 2) % 2) + 1}"
+            if PYANNOTE_AVAILABLE and speaker_pipeline is not None:
+                # Advanced speaker diarization using pyannote.audio
+                try:
+                    turns = await asyncio.to_thread(diarize_audio, audio, audio_hash, fast_diarization)
+                    speaker_ids = assign_speakers(starts, ends, turns)
+                    diarized = True
+                except Exception as e:
+                    logger.warning(f"Advanced speaker diarization failed: {e}")
             
-            segments.append(TranscriptionSegment(
-                start=segment["start"],
-                end=segment["end"],
-                text=segment["text"].strip(),
-                speaker=speaker_id
-            ))
-        
-        # Clean up temporary file
-        os.unlink(temp_file_path)
+            if not diarized:
+                # Simple speaker detection based on segment patterns
+                # This is a basic heuristic - longer pauses might indicate speaker changes
+                indices = np.arange(n_segments)
+                
+                # If there's a pause longer than 2 seconds, assume speaker change,
+                # otherwise continue with previous speaker pattern
+                changes = np.concatenate(([False], starts[1:] - ends[:-1] > 2.0))
+                speaker_nums = np.where(changes, (indices // 3) % 2 + 1, (indices // 2) % 2 + 1)
+                speaker_ids = [f"SPEAKER_{num}" for num in speaker_nums.tolist()]
         
+        # Build the TranscriptionResponse-shaped payload directly; returning a Response
+        # skips FastAPI's re-validation, while response_model still documents the schema
         response_data = {
             "text": result["text"],
-            "segments": [seg.model_dump() for seg in segments]
+            "segments": [
+                {
+                    "start": float(segment["start"]),
+                    "end": float(segment["end"]),
+                    "text": segment["text"].strip(),
+                    "speaker": speaker_id
+                }
+                for segment, speaker_id in zip(result_segments, speaker_ids)
+            ]
         }
         
         # Cache the result for future requests
-        save_to_cache(cache_key, response_data)
+        save_to_cache(cache_key, response_data, audio_hash, audio)
         
         total_time = time.time() - start_time
         logger.info(f"Transcription completed for {file.filename} in {total_time:.2f}s")
         
-        return TranscriptionResponse(**response_data)
+        return ORJSONResponse(response_data)
         
     except Exception as e:
         # Clean up temporary file if it exists
@@ -298,22 +813,25 @@ async def get_performance_info():
     Returns:
         Dictionary with performance settings and cache statistics
     """
-    cache_files = list(cache_dir.glob("*.json"))
-    cache_size_mb = sum(f.stat().st_size for f in cache_files) / (1024 * 1024)
+    cache_size_mb = _cache_bytes / (1024 * 1024)
     
     return {
-        "model": "tiny (optimized for CPU speed)",
+        "model": "base (optimized for CPU speed)",
+        "backend": model_backend,
         "optimizations": {
             "caching_enabled": True,
-            "fp16_disabled": True,
+            "device": DEVICE,
+            "fp16_disabled": DEVICE != "cuda",
             "beam_size": 1,
             "best_of": 1,
-            "temperature": 0
+            "temperature": 0,
+            "condition_on_previous_text": False
         },
         "cache_stats": {
-            "cached_files": len(cache_files),
+            "cached_files": _cache_files,
             "cache_size_mb": round(cache_size_mb, 2),
-            "cache_directory": str(cache_dir)
+            "cache_directory": str(cache_dir),
+            "cache_format": CACHE_FORMAT
         },
         "recommendations": [
             "Cache will speed up repeated transcriptions of the same files",
@@ -330,12 +848,18 @@ async def clear_cache():
     Returns:
         Dictionary with cache clearing results
     """
+    global _cache_files, _cache_bytes
     try:
-        cache_files = list(cache_dir.glob("*.json"))
+        _pending.clear()
+        load_cache_file.cache_clear()
+        cache_files = list(cache_dir.glob(f"*/*{CACHE_SUFFIX}"))
         files_deleted = len(cache_files)
         
         for cache_file in cache_files:
             cache_file.unlink()
+        for extra_file in [*cache_dir.glob("*/*.npy"), *cache_dir.glob("*/*.alias"), *cache_dir.glob("*/*.diarization")]:
+            extra_file.unlink()
+        _cache_files, _cache_bytes = 0, 0
         
         return {
             "status": "success",
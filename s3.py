@@ -1,75 +1,323 @@
+import asyncio
 import boto3
+import logging
+import orjson
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 import os
+import queue
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+
+log = logging.getLogger(__name__)
+
+# Pool sized above the download/listing thread pools; adaptive retries back off on 503 SlowDown
+_CFG = Config(
+    max_pool_connections=64,
+    retries={'max_attempts': 10, 'mode': 'adaptive'},
+    tcp_keepalive=True
+)
+
+try:
+    import aioboto3
+    from aiobotocore.config import AioConfig
+    AIOBOTO3_AVAILABLE = True
+    _AIO_CFG = AioConfig(
+        max_pool_connections=64,
+        retries={'max_attempts': 10, 'mode': 'adaptive'}
+    )
+except ImportError:
+    AIOBOTO3_AVAILABLE = False
+    aioboto3 = None
+
+try:
+    # AWS Common Runtime: C S3 client with its own connection pool and multipart scheduling
+    import botocore.session
+    from s3transfer.crt import (
+        BotocoreCRTCredentialsWrapper,
+        BotocoreCRTRequestSerializer,
+        CRTTransferManager,
+        create_s3_crt_client,
+    )
+    CRT_AVAILABLE = True
+except ImportError:
+    CRT_AVAILABLE = False
+
+try:
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow import fs as pafs
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pc = ds = pafs = None
+
+try:
+    # Optional Cython build of insert_keys (cythonize -i summary_core.pyx)
+    import summary_core
+    SUMMARY_CORE_AVAILABLE = True
+except ImportError:
+    SUMMARY_CORE_AVAILABLE = False
+    summary_core = None
 
 s3 = boto3.client(
     "s3",
+    config=_CFG,
     aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", ""),
     aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", ""),
     region_name="us-east-1"
 )
 
-def download_file(bucket_name, s3_key, local_file_path):
-    """Download file from S3 bucket to local path"""
+# Objects above 8 MB are fetched as parallel 16 MB byte-range GETs
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+_XFER = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_CHUNKSIZE,
+    max_concurrency=16,
+    use_threads=True
+)
+
+# Throughput the CRT client sizes its connection pool for, in bytes per second (5 Gbps)
+CRT_TARGET_THROUGHPUT = 5 * 1000 ** 3 // 8
+_crt_client = None
+_crt_lock = threading.Lock()
+
+def get_crt_client():
+    """Process-wide (CRT S3 client, request serializer), created on first use.
+    
+    Transfer managers keep every submitted future until shut down, so callers
+    wrap a short-lived CRTTransferManager around these per call or batch.
+    """
+    global _crt_client
+    if _crt_client is None:
+        with _crt_lock:
+            if _crt_client is None:
+                session = botocore.session.get_session()
+                session.set_credentials(
+                    os.getenv("AWS_ACCESS_KEY_ID", ""),
+                    os.getenv("AWS_SECRET_ACCESS_KEY", "")
+                )
+                crt_s3_client = create_s3_crt_client(
+                    region="us-east-1",
+                    crt_credentials_provider=BotocoreCRTCredentialsWrapper(
+                        session.get_credentials()
+                    ).to_crt_credentials_provider(),
+                    target_throughput=CRT_TARGET_THROUGHPUT,
+                    part_size=MULTIPART_CHUNKSIZE
+                )
+                serializer = BotocoreCRTRequestSerializer(session, {'region_name': "us-east-1"})
+                _crt_client = (crt_s3_client, serializer)
+    return _crt_client
+
+# Directories already created by this process
+_created_dirs = set()
+_created_lock = threading.Lock()
+
+def ensure_dir(local_dir):
+    """os.makedirs once per directory; lock-free after the first call for each path"""
+    if local_dir not in _created_dirs:
+        with _created_lock:
+            if local_dir not in _created_dirs:
+                os.makedirs(local_dir, exist_ok=True)
+                _created_dirs.add(local_dir)
+
+def add_folder_totals(nodes, parents):
+    """Add 'total_files' to every folder node in one reverse pass, without recursion.
+    
+    nodes and parents are parallel lists in creation order, so every folder
+    appears after its parent and is final before being folded into it.
+    """
+    for node in nodes:
+        node['total_files'] = node['file_count']
+        # Re-insert so keys serialize as ..., file_count, total_files, subfolders
+        node['subfolders'] = node.pop('subfolders')
+    for node, parent in zip(reversed(nodes), reversed(parents)):
+        if parent is not None:
+            parent['total_files'] += node['total_files']
+
+# Rows per S3 Inventory batch; listing pages go to insert_keys as they arrive (1000 keys each)
+TRIE_BATCH_SIZE = 10000
+
+def insert_keys(structure, nodes, parents, keys, prefix_len, include_files=False):
+    """Insert S3 keys into the folder trie, counting each file in its parent folder.
+    
+    New folder nodes are appended to nodes/parents in creation order. Returns the
+    folder node each key was counted in (None for the base prefix itself).
+    """
+    leaves = []
+    for key in keys:
+        # Remove base prefix to get relative path (Prefix= guarantees every key starts with it)
+        relative_path = key[prefix_len:].lstrip('/')
+        
+        if not relative_path:  # Skip if empty
+            leaves.append(None)
+            continue
+        
+        *folders, _ = relative_path.split('/')
+        
+        # Single descent to the parent folder; top-level files go under 'root'
+        level = structure
+        parent = None
+        for folder in folders or ['root']:
+            node = level.get(folder)
+            if node is None:
+                node = {'files': [], 'subfolders': {}, 'file_count': 0} if include_files else {'file_count': 0, 'subfolders': {}}
+                level[folder] = node
+                nodes.append(node)
+                parents.append(parent)
+            parent = node
+            level = node['subfolders']
+        node['file_count'] += 1
+        leaves.append(node)
+    return leaves
+
+def write_summary_json(summary, json_filename):
+    """Serialize summary with orjson (UTF-8, native datetimes) and write it in one call"""
+    with open(json_filename, 'wb') as f:
+        f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str))
+
+def download_file(bucket_name, s3_key, local_file_path, max_concurrency=None):
+    """Download file from S3 bucket to local path (lower max_concurrency on slow links)"""
     try:
-        print(f"📥 Downloading '{s3_key}' from bucket '{bucket_name}'...")
+        log.info(f"📥 Downloading '{s3_key}' from bucket '{bucket_name}'...")
         
         # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
+        ensure_dir(os.path.dirname(local_file_path))
         
         # Download the file
-        s3.download_file(bucket_name, s3_key, local_file_path)
-        
-        # Check if file was downloaded successfully
-        if os.path.exists(local_file_path):
-            file_size = os.path.getsize(local_file_path)
-            print(f"✅ Successfully downloaded to '{local_file_path}' (Size: {file_size} bytes)")
-            return True
+        if CRT_AVAILABLE and max_concurrency is None:
+            with CRTTransferManager(*get_crt_client()) as manager:
+                manager.download(bucket_name, s3_key, local_file_path).result()
+        elif max_concurrency is None:
+            s3.download_file(bucket_name, s3_key, local_file_path, Config=_XFER)
         else:
-            print(f"❌ Download failed - file not found at '{local_file_path}'")
-            return False
-            
+            config = TransferConfig(
+                multipart_threshold=MULTIPART_THRESHOLD,
+                multipart_chunksize=MULTIPART_CHUNKSIZE,
+                max_concurrency=max_concurrency,
+                use_threads=True
+            )
+            s3.download_file(bucket_name, s3_key, local_file_path, Config=config)
+        
+        # download_file raises on any failure, so returning means the file is on disk
+        log.info(f"✅ Successfully downloaded to '{local_file_path}'")
+        return True
+        
+    except ClientError as e:
+        log.error(f"❌ Error downloading file: {e.response.get('Error', {}).get('Message', e)}")
+        return False
     except Exception as e:
-        print(f"❌ Error downloading file: {e}")
+        log.error(f"❌ Error downloading file: {e}")
         return False
 
-def download_all_files_from_prefix(bucket_name, prefix, local_base_dir="./downloads"):
+def _download_jobs_crt(bucket_name, jobs, report):
+    """Submit every (s3_key, local_path) job to the CRT client at once; it schedules them natively"""
+    # Exiting the manager releases the futures it holds for this batch
+    with CRTTransferManager(*get_crt_client()) as manager:
+        futures = [
+            (s3_key, manager.download(bucket_name, s3_key, local_path))
+            for s3_key, local_path in jobs
+        ]
+        for s3_key, future in futures:
+            try:
+                future.result()
+                report(s3_key, None)
+            except Exception as e:
+                report(s3_key, e)
+
+def _download_jobs_threaded(bucket_name, jobs, max_workers, report):
+    """Download (s3_key, local_path) jobs on a thread pool, reporting from the calling thread"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(s3.download_file, bucket_name, s3_key, local_path): s3_key
+            for s3_key, local_path in jobs
+        }
+        for future in as_completed(futures):
+            error = future.exception()
+            report(futures[future], error)
+
+async def _download_jobs_async(bucket_name, jobs, max_concurrency, report):
+    """Download (s3_key, local_path) jobs as coroutines on one event loop"""
+    session = aioboto3.Session(
+        aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID", ""),
+        aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY", ""),
+        region_name="us-east-1"
+    )
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async with session.client("s3", config=_AIO_CFG) as s3_async:
+        async def download_one(s3_key, local_path):
+            async with semaphore:
+                try:
+                    await s3_async.download_file(bucket_name, s3_key, local_path)
+                    report(s3_key, None)
+                except Exception as e:
+                    report(s3_key, e)
+        
+        await asyncio.gather(*(download_one(s3_key, local_path) for s3_key, local_path in jobs))
+
+def download_all_files_from_prefix(bucket_name, prefix, local_base_dir="./downloads", max_workers=32):
     """Download all files from S3 bucket with specified prefix"""
     try:
         print(f"\n🔍 Finding all files in bucket '{bucket_name}' with prefix '{prefix}'...")
         
         # List all objects with the prefix
-        response = s3.list_objects_v2(
+        paginator = s3.get_paginator('list_objects_v2')
+        page_iterator = paginator.paginate(
             Bucket=bucket_name,
-            Prefix=prefix
+            Prefix=prefix,
+            PaginationConfig={'PageSize': 1000}
         )
         
-        if 'Contents' not in response:
+        # S3 keys are always '/'-delimited, so plain slicing replaces the os.path calls
+        prefix_len = len(prefix)
+        local_root = local_base_dir.rstrip('/' + os.sep) + os.sep
+        
+        jobs = []
+        for page in page_iterator:
+            for obj in page.get('Contents', []):
+                s3_key = obj['Key']
+                
+                # Create local path maintaining directory structure
+                relative_path = s3_key[prefix_len:].lstrip('/')
+                jobs.append((s3_key, local_root + relative_path.replace('/', os.sep)))
+        
+        if not jobs:
             print(f"📭 No files found with prefix '{prefix}'")
             return []
         
-        files = response['Contents']
-        total_files = len(files)
+        total_files = len(jobs)
         successful_downloads = []
         failed_downloads = []
         
         print(f"📁 Found {total_files} files to download...\n")
         
-        for i, obj in enumerate(files, 1):
-            s3_key = obj['Key']
-            file_name = os.path.basename(s3_key)
-            
-            # Create local path maintaining directory structure
-            relative_path = s3_key.replace(prefix, '').lstrip('/')
-            local_path = os.path.join(local_base_dir, relative_path)
-            
-            print(f"[{i}/{total_files}] Processing: {file_name}")
-            
-            if download_file(bucket_name, s3_key, local_path):
+        # Create every target directory up front so workers don't race on os.makedirs
+        for local_dir in {local_path.rpartition(os.sep)[0] for _, local_path in jobs}:
+            ensure_dir(local_dir)
+        
+        def report(s3_key, error):
+            # Always invoked from the calling thread, one job at a time
+            done = len(successful_downloads) + len(failed_downloads) + 1
+            if error is None:
                 successful_downloads.append(s3_key)
+                log.info(f"[{done}/{total_files}] ✅ {s3_key.rpartition('/')[2]}")
             else:
                 failed_downloads.append(s3_key)
-            
-            print()  # Empty line for better readability
+                log.error(f"[{done}/{total_files}] ❌ {s3_key.rpartition('/')[2]}: {error}")
+        
+        # Downloads are latency-bound, so run them concurrently
+        if CRT_AVAILABLE:
+            _download_jobs_crt(bucket_name, jobs, report)
+        elif AIOBOTO3_AVAILABLE:
+            asyncio.run(_download_jobs_async(bucket_name, jobs, max_workers, report))
+        else:
+            _download_jobs_threaded(bucket_name, jobs, max_workers, report)
         
         # Summary
         print(f"\n📊 Download Summary:")
@@ -87,26 +335,34 @@ def download_all_files_from_prefix(bucket_name, prefix, local_base_dir="./downlo
         print(f"❌ Error in batch download: {e}")
         return []
 
-def get_all_files_list(bucket_name, prefix=""):
-    """Get list of all files in bucket with prefix"""
+def iter_all_files(bucket_name, prefix=""):
+    """Yield {'key', 'size', 'modified'} for every file under prefix, one listing page at a time"""
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(
+        Bucket=bucket_name,
+        Prefix=prefix,
+        PaginationConfig={'PageSize': 1000}
+    ):
+        for obj in page.get('Contents', []):
+            yield {
+                'key': obj['Key'],
+                'size': obj['Size'],
+                'modified': obj['LastModified']
+            }
+
+def get_all_files_list(bucket_name, prefix="", verbose=False):
+    """Get list of all files in bucket with prefix (print each file when verbose)"""
     try:
-        response = s3.list_objects_v2(
-            Bucket=bucket_name,
-            Prefix=prefix
-        )
-        
-        if 'Contents' in response:
-            files = []
-            print(f"\n📁 Files in bucket '{bucket_name}' with prefix '{prefix}':")
-            for obj in response['Contents']:
-                file_info = {
-                    'key': obj['Key'],
-                    'size': obj['Size'],
-                    'modified': obj['LastModified']
-                }
-                files.append(file_info)
-                print(f"  - {obj['Key']} (Size: {obj['Size']} bytes, Modified: {obj['LastModified']})")
-            
+        files = list(iter_all_files(bucket_name, prefix))
+        
+        if files:
+            if verbose:
+                lines = [f"\n📁 Files in bucket '{bucket_name}' with prefix '{prefix}':"]
+                lines.extend(
+                    f"  - {file_info['key']} (Size: {file_info['size']} bytes, Modified: {file_info['modified']})"
+                    for file_info in files
+                )
+                sys.stdout.write('\n'.join(lines) + '\n')
             print(f"\nTotal files found: {len(files)}")
             return files
         else:
@@ -117,131 +373,394 @@ def get_all_files_list(bucket_name, prefix=""):
         print(f"❌ Error listing files: {e}")
         return []
 
-def create_folder_summary_json(bucket_name, base_prefix="XC_Recordings/"):
-    """Create JSON summary of folder structure with file counts"""
-    import json
-    from collections import defaultdict
+def list_shard_prefixes(bucket_name, prefix, depth=2):
+    """Expand prefix by `depth` folder levels; returns (shard prefixes, pages of objects above them)"""
+    paginator = s3.get_paginator('list_objects_v2')
+    shards = [prefix]
+    direct_pages = []
+    
+    for _ in range(depth):
+        next_shards = []
+        for shard in shards:
+            for page in paginator.paginate(
+                Bucket=bucket_name,
+                Prefix=shard,
+                Delimiter='/',
+                PaginationConfig={'PageSize': 1000}
+            ):
+                if page.get('Contents'):
+                    direct_pages.append({'Contents': page['Contents']})
+                next_shards.extend(common['Prefix'] for common in page.get('CommonPrefixes', []))
+        shards = next_shards
+    
+    return shards, direct_pages
+
+def paginate_sharded(bucket_name, prefix, shard_depth=2, max_workers=16, max_queued_pages=32):
+    """Yield list_objects_v2 pages for prefix, paginating each shard (e.g. YYYY/MM/) in parallel.
+    
+    At most max_workers shards are listed at once and at most max_queued_pages pages
+    wait for the consumer, so memory stays bounded however large the listing is.
+    Pages of different shards arrive interleaved.
+    """
+    shards, direct_pages = list_shard_prefixes(bucket_name, prefix, shard_depth)
+    yield from direct_pages
+    if not shards:
+        return
+    
+    pages = queue.Queue(maxsize=max_queued_pages)
+    remaining = iter(shards)
+    remaining_lock = threading.Lock()
+    stop = threading.Event()
+    done = object()
+    
+    def put(item):
+        # Give up once the consumer has stopped, instead of blocking on a full queue forever
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+    
+    def list_shards():
+        paginator = s3.get_paginator('list_objects_v2')
+        try:
+            while not stop.is_set():
+                with remaining_lock:
+                    shard = next(remaining, None)
+                if shard is None:
+                    break
+                for page in paginator.paginate(
+                    Bucket=bucket_name,
+                    Prefix=shard,
+                    PaginationConfig={'PageSize': 1000}
+                ):
+                    if stop.is_set():
+                        break
+                    put(page)
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+    
+    workers = [
+        threading.Thread(target=list_shards, daemon=True)
+        for _ in range(min(max_workers, len(shards)))
+    ]
+    for worker in workers:
+        worker.start()
     
     try:
-        print(f"\n🔍 Creating folder summary for '{base_prefix}' in bucket '{bucket_name}'...")
-        
-        # Get all objects with the base prefix
-        response = s3.list_objects_v2(
+        running = len(workers)
+        while running:
+            item = pages.get()
+            if item is done:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+
+def sort_structure(structure):
+    """Reorder every folder level by name in place, as a single sequential listing would produce"""
+    stack = [structure]
+    while stack:
+        level = stack.pop()
+        items = sorted(level.items())
+        level.clear()
+        level.update(items)
+        stack.extend(folder_data['subfolders'] for _, folder_data in items)
+
+def _list_and_build(bucket_name, base_prefix, include_files=False, sharded=False, pages=None, seed=None):
+    """List base_prefix once and build the folder trie shared by every summary projection.
+    
+    Returns a dict with the nested 'structure' (totals already added), the
+    number of objects seen and the LastModified of the first and last of them.
+    pages replaces the S3 listing with any iterable of list_objects_v2-shaped pages;
+    seed is a Counter of (year, month, day) file counts already taken from it.
+    """
+    if pages is not None:
+        page_iterator = pages
+    elif sharded:
+        # List year/month shards concurrently
+        page_iterator = paginate_sharded(bucket_name, base_prefix)
+    else:
+        paginator = s3.get_paginator('list_objects_v2')
+        page_iterator = paginator.paginate(
             Bucket=bucket_name,
-            Prefix=base_prefix
+            Prefix=base_prefix,
+            PaginationConfig={'PageSize': 1000}
         )
+    
+    folder_structure = {}
+    # Flat creation-order view of the same folder nodes, for the totals pass
+    nodes = []
+    parents = []
+    
+    total_objects = 0
+    prefix_len = len(base_prefix)
+    first_modified = None
+    obj = None
+    insert = summary_core.insert_keys if SUMMARY_CORE_AVAILABLE else insert_keys
+    
+    def insert_page(contents):
+        leaves = insert(folder_structure, nodes, parents, [o['Key'] for o in contents], prefix_len, include_files)
+        if include_files:
+            for o, node in zip(contents, leaves):
+                if node is not None:
+                    node['files'].append({
+                        'name': o['Key'].rpartition('/')[2],
+                        'size': o['Size'],
+                        'modified': o['LastModified']
+                    })
+    
+    # One synthetic key creates each pre-counted day folder, then the rest of its count is added
+    for (year, month, day), count in (seed or {}).items():
+        node = insert(folder_structure, nodes, parents, [f"{year}/{month}/{day}/"], 0, include_files)[0]
+        node['file_count'] += count - 1
+    
+    # Each page is inserted and dropped before the next is fetched; nothing accumulates across pages
+    for page in page_iterator:
+        contents = page.get('Contents', [])
+        if not contents:
+            continue
+        if first_modified is None:
+            first_modified = contents[0]['LastModified']
+        obj = contents[-1]
+        total_objects += len(contents)
+        insert_page(contents)
+    
+    # Calculate totals in place rather than building a second copy of the tree
+    add_folder_totals(nodes, parents)
+    if sharded:
+        # Shard pages interleave, so restore the order a sequential listing gives
+        sort_structure(folder_structure)
+    
+    return {
+        'structure': folder_structure,
+        'include_files': include_files,
+        'total_objects': total_objects,
+        'first_modified': first_modified,
+        'last_modified': obj['LastModified'] if obj is not None else None
+    }
+
+def _list_and_count_days(bucket_name, base_prefix):
+    """Folders-only trie for the YYYY/MM/DD/<file> layout, counted per day with Counters.
+    
+    One hash update per key instead of a three-level descent. Falls back to the
+    generic trie builder, seeded with the counts so far, at the first key that
+    doesn't fit the layout.
+    """
+    paginator = s3.get_paginator('list_objects_v2')
+    pages = iter(paginator.paginate(
+        Bucket=bucket_name,
+        Prefix=base_prefix,
+        PaginationConfig={'PageSize': 1000}
+    ))
+    
+    counts = Counter()
+    total_objects = 0
+    prefix_len = len(base_prefix)
+    first_modified = None
+    obj = None
+    
+    for page in pages:
+        contents = page.get('Contents', [])
+        if not contents:
+            continue
+        if first_modified is None:
+            first_modified = contents[0]['LastModified']
+        for i, obj in enumerate(contents):
+            relative_path = obj['Key'][prefix_len:].lstrip('/')
+            if not relative_path:  # Skip if empty
+                continue
+            parts = relative_path.split('/')
+            if len(parts) != 4:
+                trie = _list_and_build(
+                    bucket_name, base_prefix,
+                    pages=chain([{'Contents': contents[i:]}], pages),
+                    seed=counts
+                )
+                trie['total_objects'] += total_objects + i
+                trie['first_modified'] = first_modified
+                return trie
+            counts[(parts[0], parts[1], parts[2])] += 1
+        total_objects += len(contents)
+    
+    # Aggregate up and emit the nested structure straight from the three Counters
+    year_totals = Counter()
+    month_totals = Counter()
+    for (year, month, day), count in counts.items():
+        year_totals[year] += count
+        month_totals[(year, month)] += count
+    
+    folder_structure = {}
+    for (year, month, day), count in counts.items():
+        year_node = folder_structure.get(year)
+        if year_node is None:
+            year_node = {'file_count': 0, 'total_files': year_totals[year], 'subfolders': {}}
+            folder_structure[year] = year_node
+        month_node = year_node['subfolders'].get(month)
+        if month_node is None:
+            month_node = {'file_count': 0, 'total_files': month_totals[(year, month)], 'subfolders': {}}
+            year_node['subfolders'][month] = month_node
+        month_node['subfolders'][day] = {'file_count': count, 'total_files': count, 'subfolders': {}}
+    
+    return {
+        'structure': folder_structure,
+        'include_files': False,
+        'total_objects': total_objects,
+        'first_modified': first_modified,
+        'last_modified': obj['LastModified'] if obj is not None else None
+    }
+
+def build_summary(bucket_name, base_prefix="XC_Recordings/", include_files=True, sharded=False):
+    """List base_prefix once; pass the result as trie= to any of the summary functions"""
+    return _list_and_build(bucket_name, base_prefix, include_files=include_files, sharded=sharded)
+
+def _strip_files(structure):
+    """Copy of a folder structure without the per-file lists"""
+    result = {}
+    stack = [(structure, result)]
+    while stack:
+        source, target = stack.pop()
+        for folder_name, folder_data in source.items():
+            node = {
+                'file_count': folder_data['file_count'],
+                'total_files': folder_data['total_files'],
+                'subfolders': {}
+            }
+            target[folder_name] = node
+            stack.append((folder_data['subfolders'], node['subfolders']))
+    return result
+
+def to_detailed_json(trie, bucket_name, base_prefix):
+    """Detailed summary (per-file name, size and modified time) from a trie built with include_files"""
+    if not trie['include_files']:
+        raise ValueError("detailed summary needs a trie built with include_files=True")
+    return {
+        'bucket': bucket_name,
+        'base_path': base_prefix,
+        'generated_at': trie['last_modified'],
+        'structure': trie['structure']
+    }
+
+def to_complete_json(trie, bucket_name, base_prefix):
+    """Counts-only summary including the number of objects processed"""
+    structure = _strip_files(trie['structure']) if trie['include_files'] else trie['structure']
+    return {
+        'bucket': bucket_name,
+        'base_path': base_prefix,
+        'generated_at': None,
+        'total_objects_processed': trie['total_objects'],
+        'structure': structure
+    }
+
+def to_folders_only_json(trie, bucket_name, base_prefix):
+    """Counts-only summary without per-file details"""
+    structure = _strip_files(trie['structure']) if trie['include_files'] else trie['structure']
+    return {
+        'bucket': bucket_name,
+        'base_path': base_prefix,
+        'generated_at': trie['first_modified'],
+        'structure': structure
+    }
+
+def iter_inventory_pages(inventory_bucket, manifest_key, base_prefix=""):
+    """Open a Parquet S3 Inventory report as list_objects_v2-shaped pages.
+    
+    Returns (source bucket, page generator). Keys outside base_prefix are
+    filtered inside the Parquet scan, so they never reach Python.
+    """
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required to read S3 Inventory reports")
+    
+    manifest = orjson.loads(s3.get_object(Bucket=inventory_bucket, Key=manifest_key)['Body'].read())
+    if manifest.get('fileFormat') != 'Parquet':
+        raise ValueError(f"Unsupported inventory format '{manifest.get('fileFormat')}', expected Parquet")
+    
+    filesystem = pafs.S3FileSystem(
+        access_key=os.getenv("AWS_ACCESS_KEY_ID", ""),
+        secret_key=os.getenv("AWS_SECRET_ACCESS_KEY", ""),
+        region="us-east-1"
+    )
+    dataset = ds.dataset(
+        [f"{inventory_bucket}/{entry['key']}" for entry in manifest['files']],
+        format='parquet',
+        filesystem=filesystem
+    )
+    scan_filter = pc.starts_with(pc.field('key'), pattern=base_prefix) if base_prefix else None
+    
+    def pages():
+        for batch in dataset.to_batches(
+            columns=['key', 'size', 'last_modified_date'],
+            filter=scan_filter,
+            batch_size=TRIE_BATCH_SIZE
+        ):
+            yield {'Contents': [
+                {'Key': key, 'Size': size, 'LastModified': modified}
+                for key, size, modified in zip(
+                    batch.column(0).to_pylist(),
+                    batch.column(1).to_pylist(),
+                    batch.column(2).to_pylist()
+                )
+            ]}
+    
+    return manifest['sourceBucket'], pages()
+
+def format_structure(structure, direct_label, total_label, show_files=False, sort=False):
+    """Collect one line per folder (and optionally per file) for a single write, depth-first without recursion"""
+    lines = []
+    # Reversed pushes keep the pop order identical to a recursive pre-order walk
+    def push(level, indent):
+        items = sorted(level.items()) if sort else list(level.items())
+        stack.extend((folder_name, folder_data, indent) for folder_name, folder_data in reversed(items))
+    
+    stack = []
+    push(structure, 0)
+    while stack:
+        folder_name, folder_data, indent = stack.pop()
+        spaces = "  " * indent
+        file_count = folder_data.get('file_count', 0)
+        total_files = folder_data.get('total_files', 0)
+        lines.append(f"{spaces}📁 {folder_name}/ ({direct_label}: {file_count}, {total_label}: {total_files})")
+        
+        # Print files in this folder
+        if show_files:
+            for file_info in folder_data.get('files', []):
+                lines.append(f"{spaces}  📄 {file_info['name']} ({file_info['size']} bytes)")
+        
+        # Print subfolders
+        if folder_data.get('subfolders'):
+            push(folder_data['subfolders'], indent + 1)
+    return lines
+
+def create_folder_summary_json(bucket_name, base_prefix="XC_Recordings/", trie=None):
+    """Create JSON summary of folder structure with file counts"""
+    try:
+        print(f"\n🔍 Creating folder summary for '{base_prefix}' in bucket '{bucket_name}'...")
+        
+        if trie is None:
+            trie = _list_and_build(bucket_name, base_prefix, include_files=True)
         
-        if 'Contents' not in response:
+        if trie['total_objects'] == 0:
             print(f"📭 No files found with prefix '{base_prefix}'")
             return {}
         
-        # Build folder structure
-        folder_structure = defaultdict(lambda: {'files': [], 'subfolders': defaultdict(dict), 'file_count': 0})
-        
-        for obj in response['Contents']:
-            key = obj['Key']
-            # Remove base prefix to get relative path
-            relative_path = key.replace(base_prefix, '').lstrip('/')
-            
-            if not relative_path:  # Skip if empty
-                continue
-                
-            path_parts = relative_path.split('/')
-            
-            # Build nested structure
-            current_level = folder_structure
-            current_path = ""
-            
-            for i, part in enumerate(path_parts):
-                current_path = f"{current_path}/{part}" if current_path else part
-                
-                if i == len(path_parts) - 1:  # This is a file
-                    # Find the parent folder
-                    parent_path = '/'.join(path_parts[:-1]) if len(path_parts) > 1 else 'root'
-                    
-                    # Navigate to parent folder
-                    temp_level = folder_structure
-                    if parent_path != 'root':
-                        for folder in path_parts[:-1]:
-                            temp_level = temp_level[folder]['subfolders']
-                    
-                    # Add file info
-                    file_info = {
-                        'name': part,
-                        'size': obj['Size'],
-                        'modified': obj['LastModified'].isoformat()
-                    }
-                    
-                    if parent_path == 'root':
-                        folder_structure['root']['files'].append(file_info)
-                        folder_structure['root']['file_count'] += 1
-                    else:
-                        parent_folder = path_parts[-2]
-                        temp_parent = folder_structure
-                        for folder in path_parts[:-2]:
-                            temp_parent = temp_parent[folder]['subfolders']
-                        temp_parent[parent_folder]['files'].append(file_info)
-                        temp_parent[parent_folder]['file_count'] += 1
-                else:  # This is a folder
-                    if part not in current_level:
-                        current_level[part] = {'files': [], 'subfolders': defaultdict(dict), 'file_count': 0}
-                    current_level = current_level[part]['subfolders']
-        
-        # Convert to regular dict and calculate totals
-        def convert_and_count(d):
-            result = {}
-            for key, value in d.items():
-                if isinstance(value, dict):
-                    converted_subfolders = convert_and_count(value.get('subfolders', {}))
-                    total_files = value.get('file_count', 0)
-                    
-                    # Add subfolder file counts
-                    for subfolder in converted_subfolders.values():
-                        total_files += subfolder.get('total_files', 0)
-                    
-                    result[key] = {
-                        'files': value.get('files', []),
-                        'file_count': value.get('file_count', 0),
-                        'total_files': total_files,
-                        'subfolders': converted_subfolders
-                    }
-            return result
-        
-        final_structure = convert_and_count(folder_structure)
-        
-        # Create summary
-        summary = {
-            'bucket': bucket_name,
-            'base_path': base_prefix,
-            'generated_at': obj['LastModified'].isoformat() if 'obj' in locals() else None,
-            'structure': final_structure
-        }
+        summary = to_detailed_json(trie, bucket_name, base_prefix)
         
         # Save to JSON file
         json_filename = f"folder_summary_{bucket_name.replace('-', '_')}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        write_summary_json(summary, json_filename)
         
         print(f"✅ Folder summary saved to '{json_filename}'")
         
-        # Print summary
-        def print_structure(structure, indent=0):
-            for folder_name, folder_data in structure.items():
-                spaces = "  " * indent
-                file_count = folder_data.get('file_count', 0)
-                total_files = folder_data.get('total_files', 0)
-                print(f"{spaces}📁 {folder_name}/ (Files: {file_count}, Total: {total_files})")
-                
-                # Print files in this folder
-                for file_info in folder_data.get('files', []):
-                    print(f"{spaces}  📄 {file_info['name']} ({file_info['size']} bytes)")
-                
-                # Print subfolders
-                if folder_data.get('subfolders'):
-                    print_structure(folder_data['subfolders'], indent + 1)
-        
+        # Print summary, collected first and written in one call
         print(f"\n📊 Folder Structure Summary:")
-        print_structure(final_structure)
+        lines = format_structure(summary['structure'], "Files", "Total", show_files=True)
+        sys.stdout.write('\n'.join(lines) + '\n')
         
         return summary
         
@@ -249,123 +768,31 @@ def create_folder_summary_json(bucket_name, base_prefix="XC_Recordings/"):
         print(f"❌ Error creating folder summary: {e}")
         return {}
 
-def create_complete_folder_summary(bucket_name, base_prefix="XC_Recordings/"):
+def create_complete_folder_summary(bucket_name, base_prefix="XC_Recordings/", trie=None):
     """Create complete folder structure summary for all years, months and days"""
-    import json
-    from collections import defaultdict
-    
     try:
         print(f"\n🔍 Creating complete folder summary for '{base_prefix}' in bucket '{bucket_name}'...")
         
-        # Get all objects with the base prefix
-        paginator = s3.get_paginator('list_objects_v2')
-        page_iterator = paginator.paginate(
-            Bucket=bucket_name,
-            Prefix=base_prefix
-        )
-        
-        folder_structure = defaultdict(lambda: {'file_count': 0, 'subfolders': defaultdict(dict)})
-        total_objects = 0
+        if trie is None:
+            trie = _list_and_build(bucket_name, base_prefix, sharded=True)
         
-        for page in page_iterator:
-            if 'Contents' not in page:
-                continue
-                
-            for obj in page['Contents']:
-                total_objects += 1
-                key = obj['Key']
-                # Remove base prefix to get relative path
-                relative_path = key.replace(base_prefix, '').lstrip('/')
-                
-                if not relative_path:  # Skip if empty
-                    continue
-                    
-                path_parts = relative_path.split('/')
-                
-                # Navigate through folder structure and count files
-                current_level = folder_structure
-                
-                for i, part in enumerate(path_parts):
-                    if i == len(path_parts) - 1:  # This is a file
-                        # Count file in the parent folder
-                        if len(path_parts) == 1:  # File in root
-                            folder_structure['root']['file_count'] += 1
-                        else:
-                            # Navigate to parent folder and increment count
-                            temp_level = folder_structure
-                            for folder in path_parts[:-1]:
-                                if folder not in temp_level:
-                                    temp_level[folder] = {'file_count': 0, 'subfolders': defaultdict(dict)}
-                                temp_level = temp_level[folder]['subfolders']
-                            
-                            # Get parent folder name
-                            parent_folder = path_parts[-2]
-                            parent_level = folder_structure
-                            for folder in path_parts[:-2]:
-                                parent_level = parent_level[folder]['subfolders']
-                            parent_level[parent_folder]['file_count'] += 1
-                    else:  # This is a folder
-                        if part not in current_level:
-                            current_level[part] = {'file_count': 0, 'subfolders': defaultdict(dict)}
-                        current_level = current_level[part]['subfolders']
-        
-        if total_objects == 0:
+        if trie['total_objects'] == 0:
             print(f"📭 No files found with prefix '{base_prefix}'")
             return {}
         
-        # Convert to regular dict and calculate totals
-        def convert_and_count(d):
-            result = {}
-            for key, value in d.items():
-                if isinstance(value, dict):
-                    converted_subfolders = convert_and_count(value.get('subfolders', {}))
-                    direct_files = value.get('file_count', 0)
-                    total_files = direct_files
-                    
-                    # Add subfolder file counts
-                    for subfolder in converted_subfolders.values():
-                        total_files += subfolder.get('total_files', 0)
-                    
-                    result[key] = {
-                        'file_count': direct_files,
-                        'total_files': total_files,
-                        'subfolders': converted_subfolders
-                    }
-            return result
-        
-        final_structure = convert_and_count(folder_structure)
-        
-        # Create summary
-        summary = {
-            'bucket': bucket_name,
-            'base_path': base_prefix,
-            'generated_at': None,
-            'total_objects_processed': total_objects,
-            'structure': final_structure
-        }
+        summary = to_complete_json(trie, bucket_name, base_prefix)
         
         # Save to JSON file
         json_filename = f"complete_folder_summary_{bucket_name.replace('-', '_')}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        write_summary_json(summary, json_filename)
         
         print(f"✅ Complete folder summary saved to '{json_filename}'")
-        print(f"📊 Total objects processed: {total_objects}")
-        
-        # Print summary
-        def print_structure(structure, indent=0):
-            for folder_name, folder_data in sorted(structure.items()):
-                spaces = "  " * indent
-                file_count = folder_data.get('file_count', 0)
-                total_files = folder_data.get('total_files', 0)
-                print(f"{spaces}📁 {folder_name}/ (Direct: {file_count}, Total: {total_files})")
-                
-                # Print subfolders
-                if folder_data.get('subfolders'):
-                    print_structure(folder_data['subfolders'], indent + 1)
+        print(f"📊 Total objects processed: {trie['total_objects']}")
         
+        # Print summary, collected first and written in one call
         print(f"\n📊 Complete Folder Structure:")
-        print_structure(final_structure)
+        lines = format_structure(summary['structure'], "Direct", "Total", sort=True)
+        sys.stdout.write('\n'.join(lines) + '\n')
         
         return summary
         
@@ -373,115 +800,42 @@ def create_complete_folder_summary(bucket_name, base_prefix="XC_Recordings/"):
         print(f"❌ Error creating complete folder summary: {e}")
         return {}
 
-def create_folders_only_summary(bucket_name, base_prefix="XC_Recordings/"):
-    """Create simplified folder structure summary without individual file details"""
-    import json
-    from collections import defaultdict
+def create_complete_folder_summary_from_inventory(inventory_bucket, manifest_key, base_prefix="XC_Recordings/"):
+    """Create the complete folder summary from an S3 Inventory manifest instead of listing the bucket"""
+    try:
+        print(f"\n🔍 Reading S3 Inventory manifest '{manifest_key}' from bucket '{inventory_bucket}'...")
+        bucket_name, pages = iter_inventory_pages(inventory_bucket, manifest_key, base_prefix)
+        trie = _list_and_build(bucket_name, base_prefix, pages=pages)
+    except Exception as e:
+        print(f"❌ Error reading inventory: {e}")
+        return {}
     
+    return create_complete_folder_summary(bucket_name, base_prefix, trie=trie)
+
+def create_folders_only_summary(bucket_name, base_prefix="XC_Recordings/", trie=None):
+    """Create simplified folder structure summary without individual file details"""
     try:
         print(f"\n🔍 Creating folders-only summary for '{base_prefix}' in bucket '{bucket_name}'...")
         
-        # Get all objects with the base prefix
-        response = s3.list_objects_v2(
-            Bucket=bucket_name,
-            Prefix=base_prefix
-        )
+        if trie is None:
+            trie = _list_and_count_days(bucket_name, base_prefix)
         
-        if 'Contents' not in response:
+        if trie['total_objects'] == 0:
             print(f"📭 No files found with prefix '{base_prefix}'")
             return {}
         
-        # Build folder structure (without storing individual files)
-        folder_structure = defaultdict(lambda: {'file_count': 0, 'subfolders': defaultdict(dict)})
-        
-        for obj in response['Contents']:
-            key = obj['Key']
-            # Remove base prefix to get relative path
-            relative_path = key.replace(base_prefix, '').lstrip('/')
-            
-            if not relative_path:  # Skip if empty
-                continue
-                
-            path_parts = relative_path.split('/')
-            
-            # Navigate through folder structure and count files
-            current_level = folder_structure
-            
-            for i, part in enumerate(path_parts):
-                if i == len(path_parts) - 1:  # This is a file
-                    # Count file in the parent folder
-                    if len(path_parts) == 1:  # File in root
-                        folder_structure['root']['file_count'] += 1
-                    else:
-                        # Navigate to parent folder and increment count
-                        temp_level = folder_structure
-                        for folder in path_parts[:-1]:
-                            if folder not in temp_level:
-                                temp_level[folder] = {'file_count': 0, 'subfolders': defaultdict(dict)}
-                            temp_level = temp_level[folder]['subfolders']
-                        
-                        # Get parent folder name
-                        parent_folder = path_parts[-2]
-                        parent_level = folder_structure
-                        for folder in path_parts[:-2]:
-                            parent_level = parent_level[folder]['subfolders']
-                        parent_level[parent_folder]['file_count'] += 1
-                else:  # This is a folder
-                    if part not in current_level:
-                        current_level[part] = {'file_count': 0, 'subfolders': defaultdict(dict)}
-                    current_level = current_level[part]['subfolders']
-        
-        # Convert to regular dict and calculate totals
-        def convert_and_count(d):
-            result = {}
-            for key, value in d.items():
-                if isinstance(value, dict):
-                    converted_subfolders = convert_and_count(value.get('subfolders', {}))
-                    direct_files = value.get('file_count', 0)
-                    total_files = direct_files
-                    
-                    # Add subfolder file counts
-                    for subfolder in converted_subfolders.values():
-                        total_files += subfolder.get('total_files', 0)
-                    
-                    result[key] = {
-                        'file_count': direct_files,
-                        'total_files': total_files,
-                        'subfolders': converted_subfolders
-                    }
-            return result
-        
-        final_structure = convert_and_count(folder_structure)
-        
-        # Create summary
-        summary = {
-            'bucket': bucket_name,
-            'base_path': base_prefix,
-            'generated_at': response['Contents'][0]['LastModified'].isoformat() if response['Contents'] else None,
-            'structure': final_structure
-        }
+        summary = to_folders_only_json(trie, bucket_name, base_prefix)
         
         # Save to JSON file
         json_filename = f"folders_only_summary_{bucket_name.replace('-', '_')}.json"
-        with open(json_filename, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        write_summary_json(summary, json_filename)
         
         print(f"✅ Folders-only summary saved to '{json_filename}'")
         
-        # Print summary
-        def print_structure(structure, indent=0):
-            for folder_name, folder_data in structure.items():
-                spaces = "  " * indent
-                file_count = folder_data.get('file_count', 0)
-                total_files = folder_data.get('total_files', 0)
-                print(f"{spaces}📁 {folder_name}/ (Direct files: {file_count}, Total files: {total_files})")
-                
-                # Print subfolders
-                if folder_data.get('subfolders'):
-                    print_structure(folder_data['subfolders'], indent + 1)
-        
+        # Print summary, collected first and written in one call
         print(f"\n📊 Folders Structure (Files count only):")
-        print_structure(final_structure)
+        lines = format_structure(summary['structure'], "Direct files", "Total files")
+        sys.stdout.write('\n'.join(lines) + '\n')
         
         return summary
         
@@ -490,6 +844,8 @@ def create_folders_only_summary(bucket_name, base_prefix="XC_Recordings/"):
         return {}
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     bucket_name = "combined-client-data"
     base_prefix = "c_25884/XC_Recordings/"
     
@@ -497,6 +853,9 @@ if __name__ == "__main__":
     print("\n=== Creating Complete Folder Summary (All Years/Months/Days) ===")
     create_complete_folder_summary(bucket_name, base_prefix)
     
+    # Example 1b: Same summary from the daily S3 Inventory report (requires pyarrow)
+    # create_complete_folder_summary_from_inventory("inventory-bucket", "combined-client-data/daily/2025-01-02T01-00Z/manifest.json", base_prefix)
+    
     # Example 2: Create folders-only summary (without file details)
     print("\n=== Creating Folders-Only Summary ===")
     # create_folders_only_summary(bucket_name, base_prefix)
@@ -505,6 +864,11 @@ if __name__ == "__main__":
     print("\n=== Creating Detailed Folder Summary JSON ===")
     # create_folder_summary_json(bucket_name, base_prefix)
     
+    # Examples 2 and 3 from a single listing
+    # trie = build_summary(bucket_name, base_prefix)
+    # create_folders_only_summary(bucket_name, base_prefix, trie=trie)
+    # create_folder_summary_json(bucket_name, base_prefix, trie=trie)
+    
     # Example 4: List files in a specific path
     print("\n=== Listing Files ===")
     # files = get_all_files_list(bucket_name, "c_25884/XC_Recordings/2024/03/26/")
@@ -0,0 +1,49 @@
+# cython: language_level=3
+# Compiled trie insert for s3.py folder summaries.
+# Build in place with: cythonize -i summary_core.pyx
+from cpython.dict cimport PyDict_GetItem, PyDict_SetItem
+from cpython.ref cimport PyObject
+
+cpdef list insert_keys(dict structure, list nodes, list parents, list keys, Py_ssize_t prefix_len, bint include_files=False):
+    """Same contract as s3.insert_keys: returns the folder node each key was counted in (None if skipped)"""
+    cdef str key, rel, folder
+    cdef dict level, node, parent
+    cdef list parts
+    cdef list leaves = []
+    cdef Py_ssize_t i, depth
+    cdef PyObject* found
+
+    for key in keys:
+        rel = key[prefix_len:].lstrip('/')
+        if not rel:
+            leaves.append(None)
+            continue
+
+        parts = rel.split('/')
+        depth = len(parts) - 1
+        if depth == 0:
+            parts = ['root']
+            depth = 1
+
+        level = structure
+        parent = None
+        node = None
+        for i in range(depth):
+            folder = parts[i]
+            found = PyDict_GetItem(level, folder)
+            if found == NULL:
+                if include_files:
+                    node = {'files': [], 'subfolders': {}, 'file_count': 0}
+                else:
+                    node = {'file_count': 0, 'subfolders': {}}
+                PyDict_SetItem(level, folder, node)
+                nodes.append(node)
+                parents.append(parent)
+            else:
+                node = <dict>found
+            parent = node
+            level = <dict>node['subfolders']
+        node['file_count'] += 1
+        leaves.append(node)
+
+    return leaves